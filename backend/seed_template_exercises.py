@@ -63,14 +63,21 @@ def generate_sql_script():
     # Create table structure
     create_exercise_if_not_exists("", "", False)
     
+    # OR IGNORE needs a unique name to skip exercises that already exist
+    print("CREATE UNIQUE INDEX IF NOT EXISTS uq_exercises_name ON exercises (name);")
+    print()
+    
+    # One multi-row INSERT rather than a statement per exercise
     print("-- Insert template exercises")
+    print(f"INSERT OR IGNORE INTO exercises (name, muscle_group, is_compound) VALUES")
+    values = []
     for exercise in TEMPLATE_EXERCISES:
         name = exercise["name"].replace("'", "''")  # Escape single quotes
         muscle_group = exercise["muscle_group"]
         is_compound = exercise["is_compound"]
         
-        print(f"INSERT OR IGNORE INTO exercises (name, muscle_group, is_compound)")
-        print(f"VALUES ('{name}', '{muscle_group}', {1 if is_compound else 0});")
+        values.append(f"    ('{name}', '{muscle_group}', {1 if is_compound else 0})")
+    print(",\n".join(values) + ";")
     
     print()
     print("-- Verify template exercises were created")
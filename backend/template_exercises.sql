@@ -13,45 +13,29 @@ CREATE TABLE IF NOT EXISTS exercises (
 INSERT OR IGNORE INTO exercises (name, muscle_group, description, is_compound)
 VALUES ('', '', '', 0);
 
+CREATE UNIQUE INDEX IF NOT EXISTS uq_exercises_name ON exercises (name);
+
 -- Insert template exercises
-INSERT OR IGNORE INTO exercises (name, muscle_group, is_compound)
-VALUES ('Bench Press', 'Chest', 1);
-INSERT OR IGNORE INTO exercises (name, muscle_group, is_compound)
-VALUES ('Incline Bench Press', 'Chest', 1);
-INSERT OR IGNORE INTO exercises (name, muscle_group, is_compound)
-VALUES ('Dips', 'Chest', 1);
-INSERT OR IGNORE INTO exercises (name, muscle_group, is_compound)
-VALUES ('Overhead Press', 'Shoulders', 1);
-INSERT OR IGNORE INTO exercises (name, muscle_group, is_compound)
-VALUES ('Lateral Raise', 'Shoulders', 0);
-INSERT OR IGNORE INTO exercises (name, muscle_group, is_compound)
-VALUES ('Tricep Extension', 'Arms', 0);
-INSERT OR IGNORE INTO exercises (name, muscle_group, is_compound)
-VALUES ('Pull-Up', 'Back', 1);
-INSERT OR IGNORE INTO exercises (name, muscle_group, is_compound)
-VALUES ('Deadlift', 'Back', 1);
-INSERT OR IGNORE INTO exercises (name, muscle_group, is_compound)
-VALUES ('Bent Over Row', 'Back', 1);
-INSERT OR IGNORE INTO exercises (name, muscle_group, is_compound)
-VALUES ('Lat Pulldown', 'Back', 0);
-INSERT OR IGNORE INTO exercises (name, muscle_group, is_compound)
-VALUES ('Barbell Curl', 'Arms', 0);
-INSERT OR IGNORE INTO exercises (name, muscle_group, is_compound)
-VALUES ('Hammer Curl', 'Arms', 0);
-INSERT OR IGNORE INTO exercises (name, muscle_group, is_compound)
-VALUES ('Squat', 'Legs', 1);
-INSERT OR IGNORE INTO exercises (name, muscle_group, is_compound)
-VALUES ('Romanian Deadlift', 'Legs', 1);
-INSERT OR IGNORE INTO exercises (name, muscle_group, is_compound)
-VALUES ('Leg Press', 'Legs', 0);
-INSERT OR IGNORE INTO exercises (name, muscle_group, is_compound)
-VALUES ('Leg Curl', 'Legs', 0);
-INSERT OR IGNORE INTO exercises (name, muscle_group, is_compound)
-VALUES ('Leg Extension', 'Legs', 0);
-INSERT OR IGNORE INTO exercises (name, muscle_group, is_compound)
-VALUES ('Calf Raise', 'Legs', 0);
-INSERT OR IGNORE INTO exercises (name, muscle_group, is_compound)
-VALUES ('Plank', 'Core', 1);
+INSERT OR IGNORE INTO exercises (name, muscle_group, is_compound) VALUES
+    ('Bench Press', 'Chest', 1),
+    ('Incline Bench Press', 'Chest', 1),
+    ('Dips', 'Chest', 1),
+    ('Overhead Press', 'Shoulders', 1),
+    ('Lateral Raise', 'Shoulders', 0),
+    ('Tricep Extension', 'Arms', 0),
+    ('Pull-Up', 'Back', 1),
+    ('Deadlift', 'Back', 1),
+    ('Bent Over Row', 'Back', 1),
+    ('Lat Pulldown', 'Back', 0),
+    ('Barbell Curl', 'Arms', 0),
+    ('Hammer Curl', 'Arms', 0),
+    ('Squat', 'Legs', 1),
+    ('Romanian Deadlift', 'Legs', 1),
+    ('Leg Press', 'Legs', 0),
+    ('Leg Curl', 'Legs', 0),
+    ('Leg Extension', 'Legs', 0),
+    ('Calf Raise', 'Legs', 0),
+    ('Plank', 'Core', 1);
 
 -- Verify template exercises were created
 SELECT COUNT(*) as total_exercises FROM exercises;
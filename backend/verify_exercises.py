@@ -23,11 +23,15 @@ def verify_template_exercises():
     print("=" * 60)
     
     with app.app_context():
-        # Get all exercises currently in database
-        all_exercises = Exercise.query.all()
-        exercise_names = {ex.name for ex in all_exercises}
+        # Look up only the template names (an index probe on the unique
+        # exercise name) rather than loading every exercise
+        template_names = {name for names in template_requirements.values() for name in names}
+        exercise_names = set(db.session.scalars(
+            db.select(Exercise.name).where(Exercise.name.in_(template_names))
+        ))
+        total_exercises = db.session.scalar(db.select(db.func.count(Exercise.exercise_id)))
         
-        print(f"📊 Total exercises in database: {len(all_exercises)}")
+        print(f"📊 Total exercises in database: {total_exercises}")
         print()
         
         all_templates_ready = True
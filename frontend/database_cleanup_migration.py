@@ -26,6 +26,14 @@ from pathlib import Path
 backend_path = Path(__file__).parent.parent / "backend"
 sys.path.insert(0, str(backend_path))
 
+# Keep temp tables and hot pages in memory for the migration's scans; none
+# of these persist in the database file
+MIGRATION_PRAGMAS = (
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -65536",
+    "PRAGMA mmap_size = 268435456",
+)
+
 def get_database_path():
     """Get the path to the SQLite database"""
     db_paths = [
@@ -58,6 +66,10 @@ def check_exercise_data_consistency(cursor):
     exercise_count = cursor.fetchone()[0]
     print(f"   Current exercise count: {exercise_count}")
     
+    # Index the case-folded name so the duplicate grouping below (and the
+    # cleanup's MIN() per name) walks the index instead of sorting the table
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_exercises_lower_name ON exercises (LOWER(name))")
+    
     # Check for duplicate exercises
     cursor.execute("""
         SELECT name, COUNT(*) as count 
@@ -72,17 +84,15 @@ def check_exercise_data_consistency(cursor):
         for name, count in duplicates:
             print(f"      - {name} ({count} instances)")
         
-        # Remove duplicates, keeping the first one
-        for name, _ in duplicates:
-            cursor.execute("""
-                DELETE FROM exercises 
-                WHERE exercise_id NOT IN (
-                    SELECT MIN(exercise_id) 
-                    FROM exercises 
-                    WHERE LOWER(name) = LOWER(?)
-                )
-                AND LOWER(name) = LOWER(?)
-            """, (name, name))
+        # Remove duplicates in one pass, keeping the first of each name
+        cursor.execute("""
+            DELETE FROM exercises 
+            WHERE exercise_id NOT IN (
+                SELECT MIN(exercise_id) 
+                FROM exercises 
+                GROUP BY LOWER(name)
+            )
+        """)
         print("   ✅ Duplicate exercises removed")
     else:
         print("   ✅ No duplicate exercises found")
@@ -91,36 +101,35 @@ def recalculate_ranking_data(cursor):
     """Recalculate ranking data with new thresholds"""
     print("🏆 Recalculating ranking data with new thresholds...")
     
-    def get_rank_tier_from_points(total_points):
-        """New 5-tier ranking system"""
-        if total_points >= 500:
-            return 'Diamond'
-        elif total_points >= 300:
-            return 'Platinum'
-        elif total_points >= 150:
-            return 'Gold'
-        elif total_points >= 50:
-            return 'Silver'
-        else:
-            return 'Bronze'
-    
-    # Update user rankings with new tier calculations
-    cursor.execute("SELECT user_id, mmr_score FROM user_rankings")
-    rankings = cursor.fetchall()
-    
-    updated_count = 0
-    for user_id, mmr_score in rankings:
-        new_tier = get_rank_tier_from_points(mmr_score or 0)
-        cursor.execute("""
-            UPDATE user_rankings 
-            SET rank_tier = ? 
-            WHERE user_id = ? AND rank_tier != ?
-        """, (new_tier, user_id, new_tier))
-        if cursor.rowcount > 0:
-            updated_count += 1
+    # New 5-tier ranking system, worked out per row inside SQLite
+    new_tier = """
+        CASE
+            WHEN COALESCE(mmr_score, 0) >= 500 THEN 'Diamond'
+            WHEN COALESCE(mmr_score, 0) >= 300 THEN 'Platinum'
+            WHEN COALESCE(mmr_score, 0) >= 150 THEN 'Gold'
+            WHEN COALESCE(mmr_score, 0) >= 50 THEN 'Silver'
+            ELSE 'Bronze'
+        END
+    """
+    
+    # Update user rankings with new tier calculations in one statement,
+    # touching only rows whose tier actually changes
+    cursor.execute(f"""
+        UPDATE user_rankings 
+        SET rank_tier = {new_tier}
+        WHERE rank_tier IS NOT {new_tier}
+    """)
+    updated_count = cursor.rowcount
     
     print(f"   ✅ Updated {updated_count} user ranking tiers")
 
+def ensure_foreign_key_indexes(cursor):
+    """Index the FK columns the orphan checks probe (SQLite doesn't do this itself)"""
+    # Names match the indexes declared on the backend models
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_workout_exercises_workout ON workout_exercises (workout_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_shared_workouts_creator ON shared_workouts (creator_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_shared_workout_participants_workout ON shared_workout_participants (shared_workout_id)")
+
 def cleanup_orphaned_data(cursor):
     """Remove orphaned data and fix referential integrity"""
     print("🧹 Cleaning up orphaned data...")
@@ -128,21 +137,28 @@ def cleanup_orphaned_data(cursor):
     # Clean up workout exercises without valid workouts
     cursor.execute("""
         DELETE FROM workout_exercises 
-        WHERE workout_id NOT IN (SELECT workout_id FROM workouts)
+        WHERE NOT EXISTS (
+            SELECT 1 FROM workouts w WHERE w.workout_id = workout_exercises.workout_id
+        )
     """)
     orphaned_workout_exercises = cursor.rowcount
     
     # Clean up shared workout participants without valid shared workouts
     cursor.execute("""
         DELETE FROM shared_workout_participants 
-        WHERE shared_workout_id NOT IN (SELECT shared_workout_id FROM shared_workouts)
+        WHERE NOT EXISTS (
+            SELECT 1 FROM shared_workouts sw
+            WHERE sw.shared_workout_id = shared_workout_participants.shared_workout_id
+        )
     """)
     orphaned_participants = cursor.rowcount
     
     # Clean up user rankings for non-existent users
     cursor.execute("""
         DELETE FROM user_rankings 
-        WHERE user_id NOT IN (SELECT user_id FROM users)
+        WHERE NOT EXISTS (
+            SELECT 1 FROM users u WHERE u.user_id = user_rankings.user_id
+        )
     """)
     orphaned_rankings = cursor.rowcount
     
@@ -219,13 +235,21 @@ def run_migration():
         # Enable foreign key constraints
         cursor.execute("PRAGMA foreign_keys = ON")
         
+        for pragma in MIGRATION_PRAGMAS:
+            cursor.execute(pragma)
+        
+        # All cleanup runs in one write transaction: a single commit (and
+        # fsync) at the end, and a failure anywhere rolls everything back
+        cursor.execute("BEGIN IMMEDIATE")
+        
         # Run cleanup tasks
         check_exercise_data_consistency(cursor)
         recalculate_ranking_data(cursor)
+        ensure_foreign_key_indexes(cursor)
         cleanup_orphaned_data(cursor)
         verify_database_integrity(cursor)
         
-        # Commit changes before optimization
+        # Commit changes before optimization (the only commit of the cleanup)
         conn.commit()
         
         optimize_database(cursor, conn)